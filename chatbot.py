@@ -5,34 +5,73 @@ This module provides a Flask-based REST API for the chatbot functionality.
 It can be integrated with NLU services, databases, and external APIs.
 """
 
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
+import orjson
 import os
-import json
+import re
+import sys
+import functools
+import hashlib
+import operator
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, List, Optional
-import google.generativeai as genai  # Optional: for Gemini API integration
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional, Tuple
 
 # Get the directory where the script is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-app = Flask(__name__, static_folder='static', static_url_path='')
-CORS(app)
+# Naive datetimes are UTC throughout; emit them as ISO-8601 with a 'Z' suffix
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
 
-# Note: Static file routes are defined at the end after all API routes
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for request parsing and jsonify."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+# Chatbot API routes; the app itself is assembled by create_app()
+chatbot_bp = Blueprint('chatbot', __name__, url_prefix='/chatbot')
 
 # Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 USE_GEMINI = os.getenv('USE_GEMINI', 'false').lower() == 'true'
 MOCK_MODE = os.getenv('MOCK_MODE', 'true').lower() == 'true'
+USE_SEMANTIC_CACHE = os.getenv('USE_SEMANTIC_CACHE', 'true').lower() == 'true'
+REDIS_URL = os.getenv('REDIS_URL', '')
+CONVERSATION_TTL_SECONDS = 86400 * 30
+
+# Quick replies attached to every Gemini-generated answer
+GEMINI_QUICK_REPLIES = ('More Help', 'Dashboard', 'Calculator')
+# Returned when Gemini produces no text; never cached as an answer
+GEMINI_EMPTY_TEXT = "I'm sorry, I couldn't generate a response."
 
-if GEMINI_API_KEY and USE_GEMINI:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-pro')
+# Gemini client, created on first use by _gemini_model()
+model = None
+_model_lock = threading.Lock()
 
 # Mock user data storage (in production, use a database)
 users_db = {}
-conversations_db = {}
+
+# Conversations are shared through Redis when configured, so any worker can
+# serve them; otherwise they are kept in memory, LRU evicted beyond the cap
+redis_client = None
+if REDIS_URL:
+    import redis
+    redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+MAX_CONVERSATIONS = 10_000
+conversations_db = OrderedDict()
+_conversations_lock = threading.Lock()
 
 # Intent patterns for rule-based NLU
 INTENT_PATTERNS = {
@@ -63,145 +102,476 @@ INTENT_PATTERNS = {
 }
 
 
-def detect_intent(message: str) -> str:
-    """Detect user intent from message using rule-based patterns."""
-    message_lower = message.lower()
+def _trie_regex(words: List[str]) -> str:
+    """Build a regex alternation of ``words`` factored into a prefix trie.
+
+    Most positions then fail on their first character, and at each branch the
+    longer continuation is tried first, so the longest word matches.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
     
-    # Score each intent
-    intent_scores = {}
-    for intent, patterns in INTENT_PATTERNS.items():
-        score = sum(1 for pattern in patterns if pattern in message_lower)
-        if score > 0:
-            intent_scores[intent] = score
+    def emit(node: Dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
     
-    # Return intent with highest score
-    if intent_scores:
-        return max(intent_scores, key=intent_scores.get)
+    return emit(trie)
+
+
+def _compile_intent_patterns(patterns: Dict[str, List[str]]):
+    """Compile all intent patterns into one matcher plus per-intent bitmasks.
+
+    Each distinct pattern gets a bit. A lookahead reports the longest pattern
+    starting at every position; its bit value also covers the patterns it
+    contains, so every pattern present in the message is counted, as the
+    plain substring scan did.
+
+    Returns ``(pattern_re, pattern_bits, intent_masks)``.
+    """
+    all_patterns = list(dict.fromkeys(p.lower() for pats in patterns.values() for p in pats))
+    bit = {pattern: 1 << i for i, pattern in enumerate(all_patterns)}
+    pattern_bits = {
+        pattern: functools.reduce(operator.or_, (bit[p] for p in all_patterns if p in pattern))
+        for pattern in all_patterns
+    }
+    intent_masks = {
+        intent: functools.reduce(operator.or_, (bit[p.lower()] for p in pats), 0)
+        for intent, pats in patterns.items()
+    }
+    pattern_re = re.compile('(?=(' + _trie_regex(all_patterns) + '))')
+    return pattern_re, pattern_bits, intent_masks
+
+
+_PATTERN_RE, _PATTERN_BITS, _INTENT_MASKS = _compile_intent_patterns(INTENT_PATTERNS)
+
+
+def _match_intent(message: str) -> str:
+    """Score a lowercased message against all intent patterns."""
+    # Collect one bit per distinct pattern found in the message
+    hits = 0
+    for match in _PATTERN_RE.findall(message):
+        hits |= _PATTERN_BITS[match]
     
-    return 'general_inquiry'
+    if not hits:
+        return 'general_inquiry'
+    
+    # Score each intent by the number of its patterns that matched
+    intent_scores = {
+        intent: bin(hits & mask).count('1')
+        for intent, mask in _INTENT_MASKS.items()
+        if hits & mask
+    }
+    
+    # Return intent with highest score
+    return max(intent_scores, key=intent_scores.get)
 
 
-def generate_response(intent: str, message: str, context: Dict, is_premium: bool = False) -> Dict:
-    """Generate response based on detected intent."""
+@functools.lru_cache(maxsize=512)
+def detect_intent(message: str) -> str:
+    """Detect user intent from message using rule-based patterns.
+
+    ``message`` must already be stripped and lowercased: matching is
+    case-sensitive, and results are memoized on the normalized text.
+    """
+    # Quick-reply buttons are a closed set resolved ahead of time
+    intent = _QUICK_REPLY_INTENTS.get(message)
+    if intent is not None:
+        return intent
     
-    responses = {
-        'calculate_emission': {
-            'text': "To calculate your carbon footprint, use the calculator on the website! I can help explain what each category means. What would you like to know more about?",
-            'quick_replies': ['Transport', 'Energy', 'Food', 'Waste'],
-            'tips': [{
-                'title': 'Use the Calculator',
-                'description': 'Navigate to the calculator section',
-                'action': 'navigate:calculator'
-            }]
-        },
-        'suggest_reduction': {
-            'text': "Great question! Here are top tips to reduce your carbon footprint:\n\n1. 🚗 Reduce car travel by 20%\n2. ⚡ Switch to renewable energy\n3. 🍽️ Eat less meat\n4. ♻️ Improve recycling\n\nWould you like specific tips for any category?",
-            'quick_replies': ['Transport Tips', 'Energy Tips', 'Food Tips'],
-            'tips': [{
-                'title': 'View Insights',
-                'description': 'Check personalized insights',
-                'action': 'navigate:insights'
-            }]
-        },
-        'explain_category': {
-            'text': "I can explain different emission categories:\n\n• **Transport**: Cars, flights, public transport\n• **Energy**: Electricity, heating, renewable sources\n• **Food**: Meat, dairy, local/organic choices\n• **Waste**: Recycling, composting, waste reduction\n\nWhich category interests you?",
-            'quick_replies': ['Transport', 'Energy', 'Food', 'Waste'],
-        },
-        'subscribe_premium': {
-            'text': "Premium features include:\n• Advanced analytics\n• PDF/CSV export\n• Device integrations\n• Personalized reduction plans\n• Priority support\n\nWould you like to learn more?",
-            'quick_replies': ['View Premium', 'Subscribe'],
-            'tips': [{
-                'title': 'Premium Features',
-                'description': 'Check out premium features',
-                'action': 'navigate:premium'
-            }]
-        },
-        'export_report': {
-            'text': "Export features are available in premium. You can export your data as CSV or PDF for detailed analysis." + (
-                " I can help you export your data now!" if is_premium 
-                else " Would you like to upgrade to premium?"
-            ),
-            'quick_replies': ['Export CSV', 'Export PDF'] if is_premium else ['View Premium', 'Subscribe'],
-            'tips': [{
+    return _match_intent(message)
+
+
+def invalidate_intent_cache() -> None:
+    """Recompile intent patterns and drop memoized results.
+
+    Call this after mutating ``INTENT_PATTERNS`` at runtime.
+    """
+    global _PATTERN_RE, _PATTERN_BITS, _INTENT_MASKS, _QUICK_REPLY_INTENTS
+    _PATTERN_RE, _PATTERN_BITS, _INTENT_MASKS = _compile_intent_patterns(INTENT_PATTERNS)
+    _QUICK_REPLY_INTENTS = _build_quick_reply_intents()
+    detect_intent.cache_clear()
+
+
+# Rule-based responses whose payload never changes. Values are shared across
+# requests, so lists are stored as tuples and callers must copy before mutating.
+_STATIC_RESPONSES = MappingProxyType({
+    'calculate_emission': {
+        'text': "To calculate your carbon footprint, use the calculator on the website! I can help explain what each category means. What would you like to know more about?",
+        'quick_replies': ('Transport', 'Energy', 'Food', 'Waste'),
+        'tips': ({
+            'title': 'Use the Calculator',
+            'description': 'Navigate to the calculator section',
+            'action': 'navigate:calculator'
+        },)
+    },
+    'suggest_reduction': {
+        'text': "Great question! Here are top tips to reduce your carbon footprint:\n\n1. 🚗 Reduce car travel by 20%\n2. ⚡ Switch to renewable energy\n3. 🍽️ Eat less meat\n4. ♻️ Improve recycling\n\nWould you like specific tips for any category?",
+        'quick_replies': ('Transport Tips', 'Energy Tips', 'Food Tips'),
+        'tips': ({
+            'title': 'View Insights',
+            'description': 'Check personalized insights',
+            'action': 'navigate:insights'
+        },)
+    },
+    'explain_category': {
+        'text': "I can explain different emission categories:\n\n• **Transport**: Cars, flights, public transport\n• **Energy**: Electricity, heating, renewable sources\n• **Food**: Meat, dairy, local/organic choices\n• **Waste**: Recycling, composting, waste reduction\n\nWhich category interests you?",
+        'quick_replies': ('Transport', 'Energy', 'Food', 'Waste'),
+    },
+    'subscribe_premium': {
+        'text': "Premium features include:\n• Advanced analytics\n• PDF/CSV export\n• Device integrations\n• Personalized reduction plans\n• Priority support\n\nWould you like to learn more?",
+        'quick_replies': ('View Premium', 'Subscribe'),
+        'tips': ({
+            'title': 'Premium Features',
+            'description': 'Check out premium features',
+            'action': 'navigate:premium'
+        },)
+    },
+    'view_dashboard': {
+        'text': "Your dashboard shows:\n• Monthly CO₂e emissions\n• Category breakdown\n• Trend charts\n• Progress toward goals\n\nNavigate to the dashboard to see your data!",
+        'quick_replies': ('View Dashboard', 'Calculate Footprint'),
+        'tips': ({
+            'title': 'Go to Dashboard',
+            'description': 'View your emissions data',
+            'action': 'navigate:dashboard'
+        },)
+    },
+    'general_inquiry': {
+        'text': "I'm here to help with your carbon footprint questions! I can help you:\n\n• Calculate emissions\n• Get reduction tips\n• Understand your dashboard\n• Set goals\n\nWhat would you like to explore?",
+        'quick_replies': ('Calculate Footprint', 'Reduction Tips', 'Dashboard', 'Help'),
+    }
+})
+
+_EXPORT_TEXT = "Export features are available in premium. You can export your data as CSV or PDF for detailed analysis."
+_DEVICE_TEXT = "Device integration is a premium feature. You can connect smart meters, mobility apps, and other devices to automatically track emissions."
+_GOAL_TEXT = "Setting goals is a great way to track progress! You can set reduction goals in the Goals section. I can help you create a personalized plan."
+_GOAL_TIPS = ({
+    'title': 'Set Your Goal',
+    'description': 'Navigate to goals section',
+    'action': 'navigate:goals'
+},)
+
+# Responses that differ for premium users, keyed by intent then is_premium
+_PREMIUM_RESPONSES = MappingProxyType({
+    'export_report': {
+        True: {
+            'text': _EXPORT_TEXT + " I can help you export your data now!",
+            'quick_replies': ('Export CSV', 'Export PDF'),
+            'tips': ({
                 'title': 'Export Data',
                 'description': 'Use export in dashboard',
                 'action': 'navigate:dashboard'
-            }] if is_premium else []
+            },)
         },
-        'connect_device': {
-            'text': "Device integration is a premium feature. You can connect smart meters, mobility apps, and other devices to automatically track emissions." + (
-                " I can help you set up device integration!" if is_premium
-                else " Upgrade to premium to access this feature."
-            ),
-            'quick_replies': ['View Devices', 'Connect Device'] if is_premium else ['View Premium'],
+        False: {
+            'text': _EXPORT_TEXT + " Would you like to upgrade to premium?",
+            'quick_replies': ('View Premium', 'Subscribe'),
+            'tips': ()
         },
-        'set_goal': {
-            'text': "Setting goals is a great way to track progress! You can set reduction goals in the Goals section. I can help you create a personalized plan." + (
-                " Let me create a custom plan for you!" if is_premium
-                else " Premium users get personalized reduction plans."
-            ),
-            'quick_replies': ['Set Goal', 'View Goals'],
-            'tips': [{
-                'title': 'Set Your Goal',
-                'description': 'Navigate to goals section',
-                'action': 'navigate:goals'
-            }]
+    },
+    'connect_device': {
+        True: {
+            'text': _DEVICE_TEXT + " I can help you set up device integration!",
+            'quick_replies': ('View Devices', 'Connect Device'),
         },
-        'view_dashboard': {
-            'text': "Your dashboard shows:\n• Monthly CO₂e emissions\n• Category breakdown\n• Trend charts\n• Progress toward goals\n\nNavigate to the dashboard to see your data!",
-            'quick_replies': ['View Dashboard', 'Calculate Footprint'],
-            'tips': [{
-                'title': 'Go to Dashboard',
-                'description': 'View your emissions data',
-                'action': 'navigate:dashboard'
-            }]
+        False: {
+            'text': _DEVICE_TEXT + " Upgrade to premium to access this feature.",
+            'quick_replies': ('View Premium',),
         },
-        'general_inquiry': {
-            'text': "I'm here to help with your carbon footprint questions! I can help you:\n\n• Calculate emissions\n• Get reduction tips\n• Understand your dashboard\n• Set goals\n\nWhat would you like to explore?",
-            'quick_replies': ['Calculate Footprint', 'Reduction Tips', 'Dashboard', 'Help'],
-        }
-    }
-    
-    return responses.get(intent, responses['general_inquiry'])
+    },
+    'set_goal': {
+        True: {
+            'text': _GOAL_TEXT + " Let me create a custom plan for you!",
+            'quick_replies': ('Set Goal', 'View Goals'),
+            'tips': _GOAL_TIPS
+        },
+        False: {
+            'text': _GOAL_TEXT + " Premium users get personalized reduction plans.",
+            'quick_replies': ('Set Goal', 'View Goals'),
+            'tips': _GOAL_TIPS
+        },
+    },
+})
 
 
-def generate_gemini_response(message: str, conversation_history: List[Dict], context: Dict) -> str:
-    """Generate response using Google Gemini API."""
+def _lookup_response(intent: str, is_premium: bool) -> Dict:
+    """Return the shared response payload for an intent; callers must not mutate it."""
+    response = _STATIC_RESPONSES.get(intent)
+    if response is None:
+        variants = _PREMIUM_RESPONSES.get(intent)
+        response = variants[bool(is_premium)] if variants else _STATIC_RESPONSES['general_inquiry']
+    return response
+
+
+def generate_response(intent: str, message: str, context: Dict, is_premium: bool = False) -> Dict:
+    """Generate response based on detected intent.
+
+    Returns a shallow copy of a shared payload; nested values must not be mutated.
+    """
+    return dict(_lookup_response(intent, is_premium))
+
+
+def dispatch(message: str, is_premium: bool = False) -> Tuple[str, Dict]:
+    """Detect the intent of a normalized message and return it with its response.
+
+    The payload is shared, not copied: build a new dict to add fields to it.
+    """
+    intent = detect_intent(message)
+    return intent, _lookup_response(intent, is_premium)
+
+
+def _quick_replies() -> List[str]:
+    """Return every distinct quick-reply label the rule-based responses offer."""
+    payloads = list(_STATIC_RESPONSES.values()) + [
+        variant for variants in _PREMIUM_RESPONSES.values() for variant in variants.values()
+    ]
+    return list(dict.fromkeys(reply for payload in payloads for reply in payload['quick_replies']))
+
+
+def _build_quick_reply_intents() -> Dict[str, str]:
+    """Map each normalized quick-reply label to the intent its text scores as."""
+    return {reply.lower(): _match_intent(reply.lower()) for reply in _quick_replies()}
+
+
+_QUICK_REPLY_INTENTS = _build_quick_reply_intents()
+
+
+def _seed_semantic_cache(cache) -> None:
+    """Pin the rule-based answer for every quick-reply button in the semantic cache.
+
+    Quick replies are a closed vocabulary produced by this server, so they are
+    embedded once in a single batch and served without calling Gemini. Runs
+    when the cache first loads its embedding model, not at import.
+    """
+    quick_replies = _quick_replies()
+    embeddings = cache.embed_many(quick_replies)
+    for is_premium in (False, True):
+        cache.seed(embeddings, int(is_premium), [
+            dispatch(reply.lower(), is_premium)[1] for reply in quick_replies
+        ])
+
+
+# Semantic cache for Gemini answers; the embedding model loads on first use
+semantic_cache = None
+if USE_SEMANTIC_CACHE and USE_GEMINI and GEMINI_API_KEY and not MOCK_MODE:
     try:
-        prompt = f"""You are a helpful carbon footprint assistant. Help users understand and reduce their environmental impact.
+        from semantic_cache import SemanticCache
+    except ImportError as e:
+        print(f"Semantic cache disabled: {e}")
+    else:
+        semantic_cache = SemanticCache(on_load=_seed_semantic_cache)
+
+
+def _gemini_model():
+    """Return the Gemini model, importing and configuring the SDK on first call.
+
+    The SDK pulls in grpc and protobuf, so deployments running without Gemini
+    never pay for the import.
+    """
+    global model
+    if model is None:
+        with _model_lock:
+            if model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=GEMINI_API_KEY)
+                model = genai.GenerativeModel('gemini-pro')
+    return model
+
+
+def _build_gemini_prompt(message: str, conversation_history: List[Dict], context: Dict) -> str:
+    """Build the Gemini prompt from the user message, recent history and context."""
+    # Compact JSON: the model gains nothing from indentation, and it costs tokens
+    recent_history = conversation_history[-5:]
+    history_json = orjson.dumps(recent_history).decode() if recent_history else 'No history'
+    return f"""You are a helpful carbon footprint assistant. Help users understand and reduce their environmental impact.
 
 Context about the user:
 - Premium user: {context.get('is_premium', False)}
 - Current emissions: {context.get('monthly_co2e', 'Unknown')} tCO₂e/month
 
 Conversation history:
-{json.dumps(conversation_history[-5:], indent=2) if conversation_history else 'No history'}
+{history_json}
 
 User message: {message}
 
 Provide a helpful, encouraging, and informative response. Keep it concise and actionable."""
-        
-        response = model.generate_content(prompt)
-        return response.text if response.text else "I'm sorry, I couldn't generate a response."
+
+
+def generate_gemini_response(message: str, conversation_history: List[Dict], context: Dict) -> str:
+    """Generate response using Google Gemini API."""
+    try:
+        prompt = _build_gemini_prompt(message, conversation_history, context)
+        response = _gemini_model().generate_content(prompt)
+        return response.text if response.text else GEMINI_EMPTY_TEXT
     except Exception as e:
         print(f"Gemini API error: {e}")
         return None
 
 
-@app.route('/health', methods=['GET'])
+def generate_gemini_stream(message: str, conversation_history: List[Dict], context: Dict) -> Iterator[str]:
+    """Yield Gemini response text incrementally as it is generated.
+
+    Errors are raised to the caller, which decides how to recover mid-stream.
+    """
+    prompt = _build_gemini_prompt(message, conversation_history, context)
+    for chunk in _gemini_model().generate_content(prompt, stream=True):
+        # Tail frames (finish_reason STOP) and blocked prompts carry no parts
+        if not chunk.candidates:
+            continue
+        for part in chunk.candidates[0].content.parts:
+            # Drop reasoning frames, only the answer is shown to the user
+            if getattr(part, 'thought', False):
+                continue
+            if part.text:
+                yield part.text
+
+
+def _cache_scope(message: str, is_premium: bool, conversation_history: List[Dict],
+                 user_context: Dict) -> int:
+    """Return the semantic cache scope covering everything the Gemini prompt depends on.
+
+    Prompts without per-user context (no earlier turns in the history window,
+    no emissions figure) share the tier scope ``int(is_premium)`` with the
+    seeded quick replies. Otherwise the scope is a hash of the tier, emissions
+    and earlier turns, so an answer is only reused for the same conversation.
+    """
+    window = conversation_history[-5:]
+    # chatbot.js sends the current message as the last history entry
+    if (window and isinstance(window[-1], dict) and window[-1].get('role') == 'user'
+            and str(window[-1].get('content', '')).strip() == message):
+        window = window[:-1]
+    monthly_co2e = user_context.get('monthly_co2e', 0)
+    if not window and not monthly_co2e:
+        return int(bool(is_premium))
+    # Timestamps are left out: they change on every turn but don't change the answer
+    turns = [(turn.get('role'), turn.get('content')) if isinstance(turn, dict) else turn
+             for turn in window]
+    key = orjson.dumps([bool(is_premium), monthly_co2e, turns], default=str)
+    # Offset past the tier scopes 0 and 1; 7 bytes keep it within int64
+    return 2 + int.from_bytes(hashlib.blake2b(key, digest_size=7).digest(), 'big')
+
+
+def _semantic_lookup(message: str, is_premium: bool, scope: int):
+    """Look up a semantically cached answer for a Gemini-mode chat message.
+
+    Returns ``(embedding, cached)``; pass the embedding to _semantic_store.
+    """
+    if semantic_cache is None:
+        return None, None
+    embedding = semantic_cache.embed(message)
+    cached = semantic_cache.lookup(embedding, scope)
+    tier_scope = int(bool(is_premium))
+    if cached is None and scope != tier_scope:
+        # Seeded quick-reply answers are context-free, so every scope may use them
+        cached = semantic_cache.lookup(embedding, tier_scope, pinned_only=True)
+    return embedding, cached
+
+
+def _semantic_store(embedding, scope: int, payload: Dict) -> None:
+    """Cache a Gemini answer under the embedding returned by _semantic_lookup."""
+    if semantic_cache is not None and embedding is not None and payload['text'] != GEMINI_EMPTY_TEXT:
+        semantic_cache.add(embedding, scope, payload)
+
+
+def _sse_event(payload: Dict) -> str:
+    """Format a payload as a Server-Sent Events data frame."""
+    return f"data: {current_app.json.dumps(payload)}\n\n"
+
+
+def _stream_chat(message: str, intent: str, response: Dict, conversation_history: List[Dict],
+                 user_context: Dict, is_premium: bool) -> Response:
+    """Stream a chat reply as SSE text deltas followed by a final metadata frame."""
+    def generate():
+        if USE_GEMINI and GEMINI_API_KEY and not MOCK_MODE:
+            scope = _cache_scope(message, is_premium, conversation_history, user_context)
+            embedding, cached = _semantic_lookup(message, is_premium, scope)
+            if cached:
+                yield _sse_event({'delta': cached['text']})
+                yield _sse_event({
+                    'done': True,
+                    **{key: value for key, value in cached.items() if key != 'text'},
+                    'intent': intent,
+                    'timestamp': datetime.utcnow()
+                })
+                return
+            
+            chunks = []
+            completed = False
+            try:
+                for delta in generate_gemini_stream(message, conversation_history, {
+                    'is_premium': is_premium,
+                    'monthly_co2e': user_context.get('monthly_co2e', 0)
+                }):
+                    chunks.append(delta)
+                    yield _sse_event({'delta': delta})
+                completed = True
+            except Exception as e:
+                print(f"Gemini API error: {e}")
+            
+            # Once text has been sent, finish the stream rather than switching answers,
+            # flagging a cut-off answer as truncated; only complete answers are cached
+            if chunks:
+                done = {
+                    'done': True,
+                    'quick_replies': GEMINI_QUICK_REPLIES,
+                    'intent': intent,
+                    'timestamp': datetime.utcnow()
+                }
+                if completed:
+                    _semantic_store(embedding, scope, {
+                        'text': ''.join(chunks),
+                        'quick_replies': GEMINI_QUICK_REPLIES
+                    })
+                else:
+                    done['truncated'] = True
+                yield _sse_event(done)
+                return
+        
+        # Fallback to rule-based responses
+        yield _sse_event({'delta': response['text']})
+        yield _sse_event({
+            'done': True,
+            **{key: value for key, value in response.items() if key != 'text'},
+            'intent': intent,
+            'timestamp': datetime.utcnow()
+        })
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Keep reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+
 def health():
     """Health check endpoint."""
     return jsonify({
         'status': 'healthy',
         'service': 'carbon-footprint-chatbot',
         'mock_mode': MOCK_MODE,
-        'gemini_enabled': USE_GEMINI and bool(GEMINI_API_KEY)
+        'gemini_enabled': USE_GEMINI and bool(GEMINI_API_KEY),
+        'intent_cache': detect_intent.cache_info()._asdict(),
+        'semantic_cache_entries': len(semantic_cache) if semantic_cache is not None else 0,
+        'conversation_store': 'redis' if redis_client is not None else 'memory',
+        # Counting Redis keys would scan the whole keyspace, so only report it in memory
+        'conversations': len(conversations_db) if redis_client is None else None
     })
 
 
-@app.route('/chatbot/chat', methods=['POST'])
-def chat():
-    """Main chatbot endpoint."""
+@chatbot_bp.route('/chat', methods=['POST'])
+@chatbot_bp.route('/chat/stream', methods=['POST'], defaults={'stream': True})
+def chat(stream: bool = False):
+    """Main chatbot endpoint.
+
+    Replies are streamed as Server-Sent Events on /chatbot/chat/stream, or when
+    the client prefers ``text/event-stream`` in its Accept header.
+    """
     try:
         data = request.json
         message = data.get('message', '').strip()
@@ -215,30 +585,46 @@ def chat():
         # Get user info
         is_premium = user_context.get('is_premium', False) or MOCK_MODE
         
-        # Detect intent
-        intent = detect_intent(message)
+        # Detect intent and its rule-based response (normalized so quick replies
+        # share cache entries)
+        intent, response = dispatch(message.lower(), is_premium)
+        
+        if stream or request.accept_mimetypes.best_match(
+                ['application/json', 'text/event-stream']) == 'text/event-stream':
+            return _stream_chat(message, intent, response, conversation_history, user_context, is_premium)
         
         # Generate response
         if USE_GEMINI and GEMINI_API_KEY and not MOCK_MODE:
+            # Answer semantically similar questions from cache, scoped by tier and context
+            scope = _cache_scope(message, is_premium, conversation_history, user_context)
+            embedding, cached = _semantic_lookup(message, is_premium, scope)
+            if cached:
+                return jsonify({
+                    **cached,
+                    'intent': intent,
+                    'timestamp': datetime.utcnow()
+                })
+            
             # Use Gemini API
             gemini_response = generate_gemini_response(message, conversation_history, {
                 'is_premium': is_premium,
                 'monthly_co2e': user_context.get('monthly_co2e', 0)
             })
             if gemini_response:
+                payload = {'text': gemini_response, 'quick_replies': GEMINI_QUICK_REPLIES}
+                _semantic_store(embedding, scope, payload)
                 return jsonify({
-                    'text': gemini_response,
+                    **payload,
                     'intent': intent,
-                    'quick_replies': ['More Help', 'Dashboard', 'Calculator'],
-                    'timestamp': datetime.utcnow().isoformat()
+                    'timestamp': datetime.utcnow()
                 })
         
         # Fallback to rule-based responses
-        response = generate_response(intent, message, user_context, is_premium)
-        response['intent'] = intent
-        response['timestamp'] = datetime.utcnow().isoformat()
-        
-        return jsonify(response)
+        return jsonify({
+            **response,
+            'intent': intent,
+            'timestamp': datetime.utcnow()
+        })
     
     except Exception as e:
         print(f"Chat endpoint error: {e}")
@@ -248,7 +634,7 @@ def chat():
         }), 500
 
 
-@app.route('/chatbot/intents', methods=['GET'])
+@chatbot_bp.route('/intents', methods=['GET'])
 def list_intents():
     """List available chatbot intents."""
     return jsonify({
@@ -257,7 +643,7 @@ def list_intents():
     })
 
 
-@app.route('/chatbot/conversation', methods=['POST'])
+@chatbot_bp.route('/conversation', methods=['POST'])
 def save_conversation():
     """Save conversation history (stub for database integration)."""
     try:
@@ -265,22 +651,46 @@ def save_conversation():
         user_id = data.get('userId')
         conversation = data.get('conversation', [])
         
-        if user_id:
-            conversations_db[user_id] = conversation
+        if user_id and redis_client is not None:
+            redis_client.set(f"conv:{user_id}", orjson.dumps(conversation), ex=CONVERSATION_TTL_SECONDS)
+        elif user_id:
+            with _conversations_lock:
+                conversations_db[user_id] = conversation
+                conversations_db.move_to_end(user_id)
+                if len(conversations_db) > MAX_CONVERSATIONS:
+                    conversations_db.popitem(last=False)
         
         return jsonify({'success': True, 'message': 'Conversation saved'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/chatbot/conversation/<user_id>', methods=['GET'])
+@chatbot_bp.route('/conversation/<user_id>', methods=['GET'])
 def get_conversation(user_id):
     """Get conversation history for a user."""
-    conversation = conversations_db.get(user_id, [])
-    return jsonify({'conversation': conversation})
+    if redis_client is not None:
+        try:
+            data = redis_client.get(f"conv:{user_id}")
+            return jsonify({'conversation': orjson.loads(data) if data else []})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    with _conversations_lock:
+        conversation = conversations_db.get(user_id)
+        if conversation is not None:
+            conversations_db.move_to_end(user_id)
+    return jsonify({'conversation': conversation or []})
+
+
+# Monthly plan steps: (month, focus, action, fraction of current emissions saved)
+_PLAN_STEPS = (
+    (1, 'Transport', 'Reduce car travel by 10%', 0.05),
+    (2, 'Energy', 'Switch 30% to renewable energy', 0.08),
+    (3, 'Food', 'Reduce meat consumption by 2 meals/week', 0.07),
+)
 
 
-@app.route('/chatbot/premium/plan', methods=['POST'])
+@chatbot_bp.route('/premium/plan', methods=['POST'])
 def generate_premium_plan():
     """Generate personalized reduction plan (Premium feature)."""
     try:
@@ -301,26 +711,15 @@ def generate_premium_plan():
             'target_reduction': goal_reduction,
             'current_monthly_emissions': current_emissions,
             'target_monthly_emissions': current_emissions * (1 - goal_reduction / 100),
-            'timeline_months': 3,
+            'timeline_months': len(_PLAN_STEPS),
             'steps': [
                 {
-                    'month': 1,
-                    'focus': 'Transport',
-                    'action': 'Reduce car travel by 10%',
-                    'expected_reduction': current_emissions * 0.05
-                },
-                {
-                    'month': 2,
-                    'focus': 'Energy',
-                    'action': 'Switch 30% to renewable energy',
-                    'expected_reduction': current_emissions * 0.08
-                },
-                {
-                    'month': 3,
-                    'focus': 'Food',
-                    'action': 'Reduce meat consumption by 2 meals/week',
-                    'expected_reduction': current_emissions * 0.07
+                    'month': month,
+                    'focus': focus,
+                    'action': action,
+                    'expected_reduction': current_emissions * fraction
                 }
+                for month, focus, action, fraction in _PLAN_STEPS
             ]
         }
         
@@ -330,39 +729,102 @@ def generate_premium_plan():
         return jsonify({'error': str(e)}), 500
 
 
-# Serve static files (must be last route)
-@app.route('/<path:filename>')
+# Request paths reserved for the API, never served from disk
+_API_PREFIXES = ('api/', 'chatbot/', 'health')
+
+# Static file types that may be served from BASE_DIR
+_STATIC_RE = re.compile(r'.+\.(?:js|css|json|png|jpe?g|svg|ico|woff2?)$')
+
+# index.html loads these without version query strings, so they are always
+# revalidated (ETag/304) instead of cached for SEND_FILE_MAX_AGE_DEFAULT
+_REVALIDATE_EXTENSIONS = ('.js', '.css', '.json')
+
+
+# Serve static files
 def serve_static_files(filename):
     # Skip API routes
-    if filename.startswith(('api/', 'chatbot/', 'health')):
+    if filename.startswith(_API_PREFIXES):
         return jsonify({'error': 'Not found'}), 404
     
-    # Serve JS, CSS, and other static files
-    if filename.endswith(('.js', '.css', '.json', '.png', '.jpg', '.svg', '.ico')):
+    # Serve JS, CSS, and other static files with conditional GET support;
+    # missing files and paths outside BASE_DIR raise NotFound
+    if _STATIC_RE.match(filename):
         try:
-            file_path = os.path.join(BASE_DIR, filename)
-            if os.path.exists(file_path):
-                return send_file(file_path)
+            max_age = 0 if filename.endswith(_REVALIDATE_EXTENSIONS) else None
+            return send_from_directory(BASE_DIR, filename, max_age=max_age)
+        except NotFound:
+            pass
         except Exception as e:
             print(f"Error serving file {filename}: {e}")
     
     return jsonify({'error': 'File not found'}), 404
 
 
-# Serve index.html from root (must be last before static files)
-@app.route('/')
+# Serve index.html from root
 def serve_index():
-    index_path = os.path.join(BASE_DIR, 'index.html')
-    if os.path.exists(index_path):
-        return send_file(index_path)
-    return jsonify({
-        'message': 'Carbon Footprint Tracker API',
-        'status': 'running',
-        'endpoints': {
-            'chatbot': '/chatbot/chat',
-            'health': '/health'
-        }
-    })
+    try:
+        # Always revalidate the entry page; together with the scripts it loads
+        # (see _REVALIDATE_EXTENSIONS) this makes new deployments show up immediately
+        return send_from_directory(BASE_DIR, 'index.html', max_age=0)
+    except NotFound:
+        return jsonify({
+            'message': 'Carbon Footprint Tracker API',
+            'status': 'running',
+            'endpoints': {
+                'chatbot': '/chatbot/chat',
+                'health': '/health'
+            }
+        })
+
+
+def create_app() -> Flask:
+    """Create the Flask app with the chatbot API, health check and frontend routes."""
+    # Static assets are served by serve_static_files, so Flask's own static route
+    # is disabled to keep it from shadowing that handler
+    app = Flask(__name__, static_folder=None)
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
+    # Hand file bodies to a fronting server (Apache mod_xsendfile, lighttpd) via X-Sendfile.
+    # Only enable behind such a proxy: Flask then sends headers without the file body.
+    app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+    app.json = ORJSONProvider(app)
+    CORS(app)
+    
+    app.register_blueprint(chatbot_bp)
+    app.add_url_rule('/health', view_func=health, methods=['GET'])
+    app.add_url_rule('/', view_func=serve_index)
+    app.add_url_rule('/<path:filename>', view_func=serve_static_files)
+    return app
+
+
+app = create_app()
+
+
+def run_server(host: str, port: int, debug: bool = False) -> None:
+    """Run the app under Gunicorn, or Flask's dev server when debugging.
+
+    Gunicorn is POSIX-only, so Windows and installs without it fall back to
+    the threaded development server.
+    """
+    if not debug and os.name == 'posix':
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("Gunicorn not installed, falling back to the Flask development server")
+        else:
+            os.environ['HOST'] = host
+            os.environ['PORT'] = str(port)
+            # execv discards unflushed stdio buffers, which would drop the startup
+            # banner when stdout is a pipe or file
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.execv(sys.executable, [
+                sys.executable, '-m', 'gunicorn',
+                '--config', os.path.join(BASE_DIR, 'gunicorn.conf.py'),
+                '--chdir', BASE_DIR,
+                'chatbot:app'
+            ])
+    
+    app.run(host=host, port=port, debug=debug, threaded=True)
 
 
 if __name__ == '__main__':
@@ -378,6 +840,7 @@ if __name__ == '__main__':
     
     Endpoints:
     - POST /chatbot/chat - Main chat endpoint
+    - POST /chatbot/chat/stream - Streaming chat (Server-Sent Events)
     - GET  /chatbot/intents - List available intents
     - POST /chatbot/conversation - Save conversation
     - GET  /chatbot/conversation/<user_id> - Get conversation
@@ -385,5 +848,5 @@ if __name__ == '__main__':
     - GET  / - Serve frontend (if files exist)
     """)
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    run_server('0.0.0.0', port, debug)
 
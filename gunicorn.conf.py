@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for the Carbon Footprint Tracker server.
+
+Threaded workers let requests blocked on the Gemini API overlap without the
+memory cost of extra processes. Override the pool size with WEB_CONCURRENCY
+and GUNICORN_THREADS.
+
+Without REDIS_URL, saved conversations live in process memory, so a single
+worker is the default and concurrency comes from threads.
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5000')}"
+default_workers = multiprocessing.cpu_count() * 2 + 1 if os.getenv('REDIS_URL') else 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
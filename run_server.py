@@ -2,11 +2,11 @@
 Run the Carbon Footprint Tracker Server
 
 This script serves both the Flask API and static files.
-For production, use a proper WSGI server like Gunicorn or uWSGI.
+Unless DEBUG is set, it runs under Gunicorn (see gunicorn.conf.py).
 """
 
 import os
-from chatbot import app
+from chatbot import run_server
 
 if __name__ == '__main__':
     # Get port from environment or use default
@@ -28,7 +28,7 @@ if __name__ == '__main__':
     """)
     
     try:
-        app.run(host=host, port=port, debug=debug, threaded=True)
+        run_server(host, port, debug)
     except KeyboardInterrupt:
         print('\n\n👋 Server stopped. Goodbye!')
 
@@ -0,0 +1,143 @@
+"""
+Carbon Footprint Chatbot - Semantic Response Cache
+
+Caches generated chatbot responses keyed by sentence-embedding similarity, so
+paraphrases of a question that was already answered skip the LLM round trip.
+Embeddings are L2-normalized, which makes a dot product the cosine similarity.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class SemanticCache:
+    """Bounded in-process cache mapping message embeddings to response payloads.
+
+    Entries are partitioned by a non-negative 64-bit integer ``scope`` (e.g.
+    ``int(is_premium)``) so answers never leak between user tiers or contexts. When full, the least recently
+    used entry is evicted; entries added with ``seed`` are pinned and never
+    evicted. ``on_load`` is called with the cache once the embedding model has
+    loaded, e.g. to ``seed`` it.
+    """
+
+    def __init__(self, model_name: str = 'sentence-transformers/all-MiniLM-L6-v2',
+                 threshold: float = 0.90, maxsize: int = 10_000,
+                 on_load: Optional[Callable[['SemanticCache'], None]] = None):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._on_load = on_load
+        self._embedder = None
+        self._disabled = False
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # Slot storage, allocated once the embedding size is known
+        self._vectors = None
+        self._scopes = np.full(maxsize, -1, dtype=np.int64)
+        self._thresholds = np.full(maxsize, threshold, dtype=np.float32)
+        self._pinned_slots = np.zeros(maxsize, dtype=bool)
+        self._payloads = [None] * maxsize
+        self._free = list(range(maxsize - 1, -1, -1))
+        self._lru = OrderedDict()
+        self._pinned = 0
+
+    def _get_embedder(self):
+        """Load the sentence-transformer model on first use, then run ``on_load``."""
+        if self._embedder is None and not self._disabled:
+            with self._load_lock:
+                if self._embedder is None and not self._disabled:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                        self._embedder = SentenceTransformer(self.model_name)
+                        if self._on_load is not None:
+                            self._on_load(self)
+                    except Exception as e:
+                        print(f"Semantic cache disabled: {e}")
+                        self._embedder = None
+                        self._disabled = True
+        return self._embedder
+
+    def embed(self, message: str) -> Optional[np.ndarray]:
+        """Return the normalized embedding for a message, or None if unavailable."""
+        embedder = self._get_embedder()
+        if embedder is None:
+            return None
+        return embedder.encode(message, normalize_embeddings=True).astype(np.float32)
+
+    def embed_many(self, messages: List[str]) -> Optional[np.ndarray]:
+        """Return normalized embeddings for several messages in one batched call."""
+        embedder = self._get_embedder()
+        if embedder is None:
+            return None
+        return embedder.encode(messages, batch_size=32, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, embedding: Optional[np.ndarray], scope: int,
+               pinned_only: bool = False) -> Optional[Dict]:
+        """Return the cached payload most similar to ``embedding`` above the threshold.
+
+        With ``pinned_only``, only entries added with ``seed`` are considered.
+        """
+        if embedding is None:
+            return None
+        with self._lock:
+            if self._vectors is None:
+                return None
+            similarities = self._vectors @ embedding
+            excluded = (self._scopes != scope) | (similarities < self._thresholds)
+            if pinned_only:
+                excluded |= ~self._pinned_slots
+            similarities[excluded] = -np.inf
+            slot = int(np.argmax(similarities))
+            if similarities[slot] == -np.inf:
+                return None
+            if slot in self._lru:
+                self._lru.move_to_end(slot)
+            return self._payloads[slot]
+
+    def add(self, embedding: Optional[np.ndarray], scope: int, payload: Dict) -> None:
+        """Store a response payload under ``embedding``, evicting the LRU entry if full."""
+        if embedding is None:
+            return
+        with self._lock:
+            slot = self._take_slot(embedding.shape[0])
+            if slot is None:
+                return
+            self._store(slot, embedding, scope, payload, self.threshold)
+            self._lru[slot] = None
+
+    def seed(self, embeddings: Optional[np.ndarray], scope: int, payloads: List[Dict],
+             threshold: float = 0.95) -> None:
+        """Pin precomputed entries (one per embedding row) that are never evicted."""
+        if embeddings is None:
+            return
+        with self._lock:
+            for embedding, payload in zip(embeddings, payloads):
+                if not self._free:
+                    break
+                slot = self._take_slot(embedding.shape[0])
+                self._store(slot, embedding, scope, payload, threshold)
+                self._pinned_slots[slot] = True
+                self._pinned += 1
+
+    def _take_slot(self, dim: int) -> Optional[int]:
+        """Return a free slot, evicting the LRU entry if needed; caller holds the lock."""
+        if self._vectors is None:
+            self._vectors = np.zeros((self.maxsize, dim), dtype=np.float32)
+        if self._free:
+            return self._free.pop()
+        if self._lru:
+            return self._lru.popitem(last=False)[0]
+        return None
+
+    def _store(self, slot: int, embedding: np.ndarray, scope: int, payload: Dict,
+               threshold: float) -> None:
+        self._vectors[slot] = embedding
+        self._scopes[slot] = scope
+        self._thresholds[slot] = threshold
+        self._payloads[slot] = payload
+
+    def __len__(self) -> int:
+        return len(self._lru) + self._pinned
@@ -0,0 +1,84 @@
+"""
+Shared fixtures: a fake sentence-transformers model and a fake Gemini model,
+so the semantic cache and the Gemini chat paths run without either SDK.
+"""
+
+import sys
+import types
+import zlib
+
+import numpy as np
+import pytest
+
+import chatbot
+from semantic_cache import SemanticCache
+
+
+class FakeSentenceTransformer:
+    """Deterministic embedder: identical texts embed identically, others near-orthogonally."""
+
+    loads = 0
+
+    def __init__(self, model_name):
+        FakeSentenceTransformer.loads += 1
+
+    def encode(self, messages, batch_size=32, normalize_embeddings=False):
+        if isinstance(messages, str):
+            return self._embed(messages)
+        return np.stack([self._embed(message) for message in messages])
+
+    @staticmethod
+    def _embed(message):
+        vector = np.random.default_rng(zlib.crc32(message.encode())).standard_normal(256)
+        return vector / np.linalg.norm(vector)
+
+
+class FakeGeminiModel:
+    """Records prompts and answers with ``text``, streamed as ``chunks``."""
+
+    def __init__(self, text='GEMINI ANSWER', chunks=('GEMINI ', 'ANSWER'), fail_after=None):
+        self.text = text
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.prompts = []
+
+    def generate_content(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        if stream:
+            return self._stream()
+        return types.SimpleNamespace(text=self.text)
+
+    def _stream(self):
+        for index, text in enumerate(self.chunks):
+            if index == self.fail_after:
+                raise RuntimeError('connection reset')
+            part = types.SimpleNamespace(text=text)
+            yield types.SimpleNamespace(candidates=[
+                types.SimpleNamespace(content=types.SimpleNamespace(parts=[part]))
+            ])
+
+
+@pytest.fixture
+def fake_sentence_transformers(monkeypatch):
+    module = types.ModuleType('sentence_transformers')
+    module.SentenceTransformer = FakeSentenceTransformer
+    monkeypatch.setitem(sys.modules, 'sentence_transformers', module)
+    monkeypatch.setattr(FakeSentenceTransformer, 'loads', 0)
+    return FakeSentenceTransformer
+
+
+@pytest.fixture
+def gemini(monkeypatch, fake_sentence_transformers):
+    """Switch chatbot to Gemini mode with a seeded semantic cache and a fake model."""
+    fake_model = FakeGeminiModel()
+    monkeypatch.setattr(chatbot, 'USE_GEMINI', True)
+    monkeypatch.setattr(chatbot, 'GEMINI_API_KEY', 'test-key')
+    monkeypatch.setattr(chatbot, 'MOCK_MODE', False)
+    monkeypatch.setattr(chatbot, 'semantic_cache', SemanticCache(on_load=chatbot._seed_semantic_cache))
+    monkeypatch.setattr(chatbot, '_gemini_model', lambda: fake_model)
+    return fake_model
+
+
+@pytest.fixture
+def client():
+    return chatbot.app.test_client()
@@ -0,0 +1,100 @@
+"""
+Checks the /chatbot/chat routes in Gemini mode against a fake Gemini model.
+"""
+
+from datetime import datetime, timezone
+
+import orjson
+
+import chatbot
+
+
+def chatbot_js_payload(message, history=()):
+    """Build the request body chatbot.js sends: history ends with the current message."""
+    return {
+        'message': message,
+        'userId': 'user-1',
+        'conversationHistory': [*history, {
+            'role': 'user',
+            'content': message,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+        }],
+    }
+
+
+def sse_frames(response):
+    """Decode the JSON payloads of an SSE response."""
+    return [orjson.loads(frame[len('data: '):])
+            for frame in response.get_data(as_text=True).split('\n\n') if frame]
+
+
+def test_repeated_question_served_from_cache(gemini, client):
+    first = client.post('/chatbot/chat', json=chatbot_js_payload('how do trees store carbon'))
+    second = client.post('/chatbot/chat', json=chatbot_js_payload('how do trees store carbon'))
+    assert first.json['text'] == second.json['text'] == 'GEMINI ANSWER'
+    assert len(gemini.prompts) == 1
+
+
+def test_cache_scoped_by_earlier_turns(gemini, client):
+    earlier = [{'role': 'user', 'content': 'i drive a truck'}, {'role': 'bot', 'content': 'ok'}]
+    client.post('/chatbot/chat', json=chatbot_js_payload('how can i cut emissions'))
+    client.post('/chatbot/chat', json=chatbot_js_payload('how can i cut emissions', earlier))
+    client.post('/chatbot/chat', json=chatbot_js_payload('how can i cut emissions', earlier))
+    assert len(gemini.prompts) == 2
+
+
+def test_cache_scoped_by_emissions(gemini, client):
+    for monthly_co2e in (0, 1.5, 1.5, 3):
+        client.post('/chatbot/chat', json={
+            'message': 'is that a lot',
+            'context': {'monthly_co2e': monthly_co2e},
+        })
+    assert len(gemini.prompts) == 3
+
+
+def test_quick_reply_seed_skips_gemini_with_history(gemini, client):
+    earlier = [{'role': 'user', 'content': 'hello'}, {'role': 'bot', 'content': 'hi'}]
+    response = client.post('/chatbot/chat', json=chatbot_js_payload('Calculate Footprint', earlier))
+    assert response.json['intent'] == 'calculate_emission'
+    assert gemini.prompts == []
+
+
+def test_empty_gemini_answer_not_cached(gemini, client):
+    gemini.text = ''
+    client.post('/chatbot/chat', json=chatbot_js_payload('what is a carbon offset'))
+    client.post('/chatbot/chat', json=chatbot_js_payload('what is a carbon offset'))
+    assert len(gemini.prompts) == 2
+
+
+def test_stream_frames(gemini, client):
+    frames = sse_frames(client.post('/chatbot/chat/stream', json=chatbot_js_payload('why plant trees')))
+    assert frames[:-1] == [{'delta': 'GEMINI '}, {'delta': 'ANSWER'}]
+    assert frames[-1]['done'] is True
+    assert frames[-1]['quick_replies'] == list(chatbot.GEMINI_QUICK_REPLIES)
+    assert 'truncated' not in frames[-1]
+
+    cached = sse_frames(client.post('/chatbot/chat/stream', json=chatbot_js_payload('why plant trees')))
+    assert cached[0] == {'delta': 'GEMINI ANSWER'}
+    assert cached[-1]['quick_replies'] == list(chatbot.GEMINI_QUICK_REPLIES)
+    assert len(gemini.prompts) == 1
+
+
+def test_stream_flags_truncated_answer(gemini, client):
+    gemini.fail_after = 1
+    frames = sse_frames(client.post('/chatbot/chat/stream', json=chatbot_js_payload('why plant trees')))
+    assert frames[:-1] == [{'delta': 'GEMINI '}]
+    assert frames[-1]['done'] is True
+    assert frames[-1]['truncated'] is True
+
+    client.post('/chatbot/chat/stream', json=chatbot_js_payload('why plant trees'))
+    assert len(gemini.prompts) == 2
+
+
+def test_stream_falls_back_without_gemini_text(gemini, client):
+    gemini.chunks = ()
+    frames = sse_frames(client.post('/chatbot/chat/stream', json=chatbot_js_payload('why plant trees')))
+    intent, response = chatbot.dispatch('why plant trees', False)
+    assert frames[0] == {'delta': response['text']}
+    assert frames[-1]['done'] is True
+    assert frames[-1]['intent'] == intent
+    assert frames[-1]['quick_replies'] == list(response['quick_replies'])
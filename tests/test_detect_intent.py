@@ -0,0 +1,53 @@
+"""
+Checks that the compiled intent matcher agrees with the original
+substring scan over INTENT_PATTERNS.
+"""
+
+import random
+
+import chatbot
+
+
+def substring_scan(message: str) -> str:
+    """Reference intent detection: count every pattern contained in the message."""
+    message_lower = message.lower()
+    intent_scores = {}
+    for intent, patterns in chatbot.INTENT_PATTERNS.items():
+        score = sum(1 for pattern in patterns if pattern in message_lower)
+        if score > 0:
+            intent_scores[intent] = score
+    if intent_scores:
+        return max(intent_scores, key=intent_scores.get)
+    return 'general_inquiry'
+
+
+def random_messages(count: int, seed: int = 1):
+    """Yield messages built from intent patterns, their fragments and filler words."""
+    words = [pattern for patterns in chatbot.INTENT_PATTERNS.values() for pattern in patterns]
+    words += ['x', 'the', 'by', 'a', ' ', 'reduc', 'smart', 'aim', 'for', 'cut',
+              'app', 'data', 'less', 'what', 'is', 'down']
+    rng = random.Random(seed)
+    for _ in range(count):
+        message = ''.join(rng.choice(words) + rng.choice(['', ' ', '  '])
+                          for _ in range(rng.randint(1, 8)))
+        if rng.random() < 0.3:
+            message = message.upper()
+        yield message.strip()
+
+
+def test_matches_substring_scan():
+    mismatches = [
+        (message, chatbot.detect_intent(message.lower()), substring_scan(message))
+        for message in random_messages(30_000)
+        if chatbot.detect_intent(message.lower()) != substring_scan(message)
+    ]
+    assert mismatches == []
+
+
+def test_quick_replies_match_substring_scan():
+    for reply in chatbot._quick_replies():
+        assert chatbot.detect_intent(reply.lower()) == substring_scan(reply)
+
+
+def test_no_pattern_is_general_inquiry():
+    assert chatbot.detect_intent('hello there') == 'general_inquiry'
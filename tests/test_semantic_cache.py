@@ -0,0 +1,114 @@
+"""
+Checks SemanticCache slot management: LRU eviction, pinned seeds, scopes,
+per-slot thresholds and lazy seeding.
+"""
+
+import numpy as np
+
+from semantic_cache import SemanticCache
+
+
+def unit(index, dim=4):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[index] = 1.0
+    return vector
+
+
+def near(index, similarity, dim=4):
+    """Return a unit vector with the given cosine similarity to unit(index)."""
+    vector = unit(index, dim) * similarity
+    vector[(index + 1) % dim] = np.sqrt(1 - similarity ** 2)
+    return vector
+
+
+def test_hit_and_miss():
+    cache = SemanticCache()
+    cache.add(unit(0), 0, {'text': 'zero'})
+    assert cache.lookup(unit(0), 0) == {'text': 'zero'}
+    assert cache.lookup(unit(1), 0) is None
+    assert cache.lookup(None, 0) is None
+
+
+def test_lru_entry_evicted_when_full():
+    cache = SemanticCache(maxsize=2)
+    cache.add(unit(0), 0, {'text': 'a'})
+    cache.add(unit(1), 0, {'text': 'b'})
+    cache.lookup(unit(0), 0)
+    cache.add(unit(2), 0, {'text': 'c'})
+    assert cache.lookup(unit(1), 0) is None
+    assert cache.lookup(unit(0), 0) == {'text': 'a'}
+    assert cache.lookup(unit(2), 0) == {'text': 'c'}
+    assert len(cache) == 2
+
+
+def test_pinned_seeds_never_evicted():
+    cache = SemanticCache(maxsize=2)
+    cache.seed(np.stack([unit(0)]), 0, [{'text': 'seed'}])
+    for index in range(1, 4):
+        cache.add(unit(index), 0, {'text': str(index)})
+    assert cache.lookup(unit(0), 0) == {'text': 'seed'}
+    assert cache.lookup(unit(3), 0) == {'text': '3'}
+    assert cache.lookup(unit(1), 0) is None
+
+
+def test_add_skipped_when_all_slots_pinned():
+    cache = SemanticCache(maxsize=1)
+    cache.seed(np.stack([unit(0)]), 0, [{'text': 'seed'}])
+    cache.add(unit(1), 0, {'text': 'added'})
+    assert cache.lookup(unit(1), 0) is None
+    assert len(cache) == 1
+
+
+def test_no_hit_across_scopes():
+    cache = SemanticCache()
+    wide_scope = 2 + 2 ** 55
+    cache.add(unit(0), 0, {'text': 'free'})
+    cache.add(unit(1), wide_scope, {'text': 'context'})
+    assert cache.lookup(unit(0), 1) is None
+    assert cache.lookup(unit(1), 0) is None
+    assert cache.lookup(unit(1), wide_scope) == {'text': 'context'}
+
+
+def test_pinned_only_ignores_added_entries():
+    cache = SemanticCache()
+    cache.seed(np.stack([unit(0)]), 0, [{'text': 'seed'}])
+    cache.add(unit(1), 0, {'text': 'added'})
+    assert cache.lookup(unit(1), 0, pinned_only=True) is None
+    assert cache.lookup(unit(0), 0, pinned_only=True) == {'text': 'seed'}
+
+
+def test_seeded_threshold_stricter_than_added():
+    cache = SemanticCache()
+    cache.seed(np.stack([unit(0)]), 0, [{'text': 'seed'}])
+    cache.add(unit(2), 0, {'text': 'added'})
+    # 0.92 clears the 0.90 default threshold but not the 0.95 seed threshold
+    assert cache.lookup(near(0, 0.92), 0) is None
+    assert cache.lookup(near(0, 0.96), 0) == {'text': 'seed'}
+    assert cache.lookup(near(2, 0.92), 0) == {'text': 'added'}
+    assert cache.lookup(near(2, 0.88), 0) is None
+
+
+def test_on_load_seeds_once(fake_sentence_transformers):
+    calls = []
+
+    def seed(cache):
+        calls.append(cache)
+        cache.seed(cache.embed_many(['hello', 'bye']), 0, [{'text': 'hi'}, {'text': 'ciao'}])
+
+    cache = SemanticCache(on_load=seed)
+    assert len(cache) == 0
+    cache.embed('hello')
+    cache.embed_many(['hello', 'again'])
+    assert calls == [cache]
+    assert fake_sentence_transformers.loads == 1
+    assert cache.lookup(cache.embed('bye'), 0) == {'text': 'ciao'}
+
+
+def test_failed_on_load_disables_cache(fake_sentence_transformers):
+    def seed(cache):
+        raise RuntimeError('boom')
+
+    cache = SemanticCache(on_load=seed)
+    assert cache.embed('hello') is None
+    assert cache.embed('hello') is None
+    assert fake_sentence_transformers.loads == 1